@@ -1,6 +1,8 @@
+from functools import lru_cache
 from typing import Optional, Tuple
 
 
+@lru_cache(maxsize=4096)
 def parse_sid(sid: str) -> Optional[Tuple[str, str, str, str]]:
     """Parse source identifiers in dot or underscore formats."""
     if not sid:
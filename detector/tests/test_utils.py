@@ -18,3 +18,11 @@ from detector import utils as utils_mod
 )
 def test_parse_sid(sid, expected):
     assert utils_mod.parse_sid(sid) == expected
+
+
+def test_parse_sid_caches_repeated_ids():
+    utils_mod.parse_sid.cache_clear()
+    first = utils_mod.parse_sid("XX_STA__HHZ")
+    second = utils_mod.parse_sid("XX_STA__HHZ")
+    assert first is second
+    assert utils_mod.parse_sid.cache_info().hits == 1
@@ -1,15 +1,20 @@
 import hashlib
 import logging
+from bisect import bisect_right
 from datetime import timedelta
 
+import numpy as np
+
 from .models import Event, Pick
 
 logger = logging.getLogger(__name__)
 
 
 def _calculate_association_key(picks: list[Pick]) -> str:
-    canonical = "_".join(str(pick.id) for pick in sorted(picks, key=lambda p: p.id))
-    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    # Little-endian int64 keeps the key stable across hosts.
+    ids = np.fromiter((pick.id for pick in picks), dtype="<i8", count=len(picks))
+    ids.sort()
+    return hashlib.blake2b(ids.tobytes(), digest_size=32).hexdigest()
 
 
 def associate_picks(
@@ -52,6 +57,7 @@ def associate_picks(
     )
 
     ordered = sorted(filtered, key=lambda pick: pick.ts)
+    ordered_ts = [pick.ts for pick in ordered]
 
     window = timedelta(seconds=window_seconds)
     events: list[Event] = []
@@ -63,13 +69,12 @@ def associate_picks(
         start_ts = ordered[i].ts
         per_station: dict[tuple[str, str, str], Pick] = {}
         window_pick_ids: set[int] = set()
-        j = i
-        while j < len(ordered) and ordered[j].ts - start_ts <= window:
-            pick = ordered[j]
+        # Picks are time-ordered, so the window is the slice [i, j).
+        j = bisect_right(ordered_ts, start_ts + window, lo=i)
+        for pick in ordered[i:j]:
             if pick.id not in used_pick_ids:
                 window_pick_ids.add(pick.id)
                 per_station.setdefault(pick.station_key, pick)
-            j += 1
 
         event_picks = sorted(per_station.values(), key=lambda p: p.ts)
         station_count = len({pick.station_key for pick in event_picks})
@@ -1,9 +1,83 @@
 from datetime import datetime, timedelta, timezone
+from itertools import starmap
 
 from .models import OriginEstimate, Pick, Station
 from .settings import Settings
 
 
+# Statements issued on every poll cycle are prepared once per connection so the
+# server skips parsing and planning on each call. Both pick queries filter on
+# phase and a time bound; an expression btree index on (UPPER(phase), ts) lets
+# the planner answer them with an index range scan instead of walking every
+# chunk of the hypertable.
+_PREPARED_STATEMENTS = {
+    "fetch_recent_picks": """
+        PREPARE fetch_recent_picks (timestamptz, double precision) AS
+        SELECT p.id, p.ts, p.phase, p.net, p.sta, p.loc, p.chan, p.score
+        FROM phase_picks p
+        WHERE p.ts >= $1
+          AND UPPER(p.phase) = 'P'
+          AND (p.score IS NULL OR p.score >= $2)
+        ORDER BY p.ts ASC
+    """,
+    "fetch_picks_since": """
+        PREPARE fetch_picks_since (timestamptz, double precision) AS
+        SELECT p.id, p.ts, p.phase, p.net, p.sta, p.loc, p.chan, p.score
+        FROM phase_picks p
+        WHERE p.ts > $1
+          AND UPPER(p.phase) = 'P'
+          AND (p.score IS NULL OR p.score >= $2)
+        ORDER BY p.ts ASC
+    """,
+    "upsert_origin": """
+        PREPARE upsert_origin (
+            timestamptz,
+            double precision,
+            double precision,
+            double precision,
+            double precision,
+            double precision,
+            integer,
+            integer,
+            text
+        ) AS
+        INSERT INTO origins (
+            origin_ts,
+            lat,
+            lon,
+            depth_km,
+            rms_seconds,
+            gap_deg,
+            n_picks,
+            n_stations,
+            status,
+            association_key
+        )
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, 'preliminary', $9)
+        ON CONFLICT (association_key)
+        DO UPDATE SET
+            origin_ts = EXCLUDED.origin_ts,
+            lat = EXCLUDED.lat,
+            lon = EXCLUDED.lon,
+            depth_km = EXCLUDED.depth_km,
+            rms_seconds = EXCLUDED.rms_seconds,
+            gap_deg = EXCLUDED.gap_deg,
+            n_picks = EXCLUDED.n_picks,
+            n_stations = EXCLUDED.n_stations,
+            updated_at = now()
+        RETURNING id
+    """,
+    "set_origin_final": """
+        PREPARE set_origin_final (bigint) AS
+        UPDATE origins
+        SET status = 'final',
+            updated_at = now()
+        WHERE id = $1
+        RETURNING id
+    """,
+}
+
+
 def connect(settings: Settings):
     import psycopg2
 
@@ -15,9 +89,16 @@ def connect(settings: Settings):
         dbname=settings.pg_dbname,
     )
     conn.autocommit = True
+    _prepare_statements(conn)
     return conn
 
 
+def _prepare_statements(conn) -> None:
+    with conn.cursor() as cur:
+        for statement in _PREPARED_STATEMENTS.values():
+            cur.execute(statement)
+
+
 def fetch_stations(conn) -> dict[tuple[str, str, str], Station]:
     with conn.cursor() as cur:
         cur.execute("SELECT net, sta, loc, lat, lon, elev_m FROM stations")
@@ -33,20 +114,13 @@ def fetch_stations(conn) -> dict[tuple[str, str, str], Station]:
 def fetch_recent_picks(
     conn,
     lookback_seconds: int,
+    min_score: float = 0.0,
 ) -> list[Pick]:
     now = datetime.now(tz=timezone.utc)
     start_ts = now - timedelta(seconds=lookback_seconds)
 
-    query = """
-        SELECT p.id, p.ts, p.phase, p.net, p.sta, p.loc, p.chan, p.score
-        FROM phase_picks p
-        WHERE p.ts >= %s
-          AND UPPER(p.phase) = 'P'
-        ORDER BY p.ts ASC
-    """
-
     with conn.cursor() as cur:
-        cur.execute(query, (start_ts,))
+        cur.execute("EXECUTE fetch_recent_picks (%s, %s)", (start_ts, min_score))
         rows = cur.fetchall()
 
     return _rows_to_picks(rows)
@@ -55,53 +129,19 @@ def fetch_recent_picks(
 def fetch_picks_since(
     conn,
     since_ts: datetime,
+    min_score: float = 0.0,
 ) -> list[Pick]:
     if since_ts.tzinfo is None:
         raise ValueError("since_ts must be timezone-aware (UTC)")
 
-    query = """
-        SELECT p.id, p.ts, p.phase, p.net, p.sta, p.loc, p.chan, p.score
-        FROM phase_picks p
-        WHERE p.ts > %s
-          AND UPPER(p.phase) = 'P'
-        ORDER BY p.ts ASC
-    """
-
     with conn.cursor() as cur:
-        cur.execute(query, (since_ts,))
+        cur.execute("EXECUTE fetch_picks_since (%s, %s)", (since_ts, min_score))
         rows = cur.fetchall()
 
     return _rows_to_picks(rows)
 
 
 def upsert_origin(conn, estimate: OriginEstimate) -> int:
-    query = """
-        INSERT INTO origins (
-            origin_ts,
-            lat,
-            lon,
-            depth_km,
-            rms_seconds,
-            gap_deg,
-            n_picks,
-            n_stations,
-            status,
-            association_key
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'preliminary', %s)
-        ON CONFLICT (association_key)
-        DO UPDATE SET
-            origin_ts = EXCLUDED.origin_ts,
-            lat = EXCLUDED.lat,
-            lon = EXCLUDED.lon,
-            depth_km = EXCLUDED.depth_km,
-            rms_seconds = EXCLUDED.rms_seconds,
-            gap_deg = EXCLUDED.gap_deg,
-            n_picks = EXCLUDED.n_picks,
-            n_stations = EXCLUDED.n_stations,
-            updated_at = now()
-        RETURNING id
-    """
     params = (
         estimate.origin_ts,
         estimate.lat,
@@ -114,12 +154,16 @@ def upsert_origin(conn, estimate: OriginEstimate) -> int:
         estimate.association_key,
     )
     with conn.cursor() as cur:
-        cur.execute(query, params)
+        cur.execute(
+            "EXECUTE upsert_origin (%s, %s, %s, %s, %s, %s, %s, %s, %s)", params
+        )
         row = cur.fetchone()
     return int(row[0])
 
 
 def replace_origin_arrivals(conn, origin_id: int, estimate: OriginEstimate) -> None:
+    from psycopg2.extras import execute_values
+
     delete_query = "DELETE FROM origin_arrivals WHERE origin_id = %s"
     insert_query = """
         INSERT INTO origin_arrivals (
@@ -136,57 +180,49 @@ def replace_origin_arrivals(conn, origin_id: int, estimate: OriginEstimate) -> N
             distance_km,
             azimuth_deg
         )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        VALUES %s
     """
+    rows = [
+        (
+            origin_id,
+            arr.pick.id,
+            arr.pick.phase,
+            arr.pick.ts,
+            arr.pick.net,
+            arr.pick.sta,
+            arr.pick.loc,
+            arr.pick.chan,
+            arr.predicted_tt_seconds,
+            arr.residual_seconds,
+            arr.distance_km,
+            arr.azimuth_deg,
+        )
+        for arr in estimate.arrivals
+    ]
 
     with conn.cursor() as cur:
         cur.execute(delete_query, (origin_id,))
-        for arr in estimate.arrivals:
-            cur.execute(
-                insert_query,
-                (
-                    origin_id,
-                    arr.pick.id,
-                    arr.pick.phase,
-                    arr.pick.ts,
-                    arr.pick.net,
-                    arr.pick.sta,
-                    arr.pick.loc,
-                    arr.pick.chan,
-                    arr.predicted_tt_seconds,
-                    arr.residual_seconds,
-                    arr.distance_km,
-                    arr.azimuth_deg,
-                ),
-            )
+        if rows:
+            execute_values(cur, insert_query, rows, page_size=500)
+
+
+def save_origin(conn, estimate: OriginEstimate) -> int:
+    # One transaction (and one commit) per origin, so readers never see an
+    # origin without its arrivals. psycopg2 >= 2.9 opens a transaction in
+    # "with conn" even when the connection is in autocommit mode.
+    with conn:
+        origin_id = upsert_origin(conn, estimate)
+        replace_origin_arrivals(conn, origin_id, estimate)
+    return origin_id
 
 
 def set_origin_final(conn, origin_id: int) -> bool:
-    query = """
-        UPDATE origins
-        SET status = 'final',
-            updated_at = now()
-        WHERE id = %s
-        RETURNING id
-    """
     with conn.cursor() as cur:
-        cur.execute(query, (origin_id,))
+        cur.execute("EXECUTE set_origin_final (%s)", (origin_id,))
         row = cur.fetchone()
     return row is not None
 
 
 def _rows_to_picks(rows) -> list[Pick]:
-    picks: list[Pick] = []
-    for row in rows:
-        pick = Pick(
-            id=row[0],
-            ts=row[1],
-            phase=row[2],
-            net=row[3],
-            sta=row[4],
-            loc=row[5],
-            chan=row[6],
-            score=row[7],
-        )
-        picks.append(pick)
-    return picks
+    # Columns are selected in Pick field order, so rows map positionally.
+    return list(starmap(Pick, rows))
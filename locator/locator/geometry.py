@@ -1,43 +1,89 @@
+import math
+
 import numpy as np
 
+EARTH_RADIUS_KM = 6371.0
+
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Calculate great circle distance in km using haversine formula."""
-    R = 6371.0
-    lat1_rad = np.radians(lat1)
-    lat2_rad = np.radians(lat2)
-    dlat = np.radians(lat2 - lat1)
-    dlon = np.radians(lon2 - lon1)
+    R = EARTH_RADIUS_KM
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
     a = (
-        np.sin(dlat / 2) ** 2
-        + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon / 2) ** 2
+        math.sin(dlat / 2) ** 2
+        + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2) ** 2
     )
-    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
     return R * c
 
 
+def haversine_distance_batch(
+    lat1: float, lon1: float, lats2: np.ndarray, lons2: np.ndarray
+) -> np.ndarray:
+    """Calculate great circle distances in km from one point to many points."""
+    R = EARTH_RADIUS_KM
+    lat1_rad = math.radians(lat1)
+    lat2_rad = np.radians(np.asarray(lats2, dtype=np.float64))
+    # Work in place on two buffers instead of one temporary per ufunc.
+    a = np.subtract(lat2_rad, lat1_rad)
+    a *= 0.5
+    np.sin(a, out=a)
+    np.square(a, out=a)
+    b = np.radians(np.asarray(lons2, dtype=np.float64) - lon1)
+    b *= 0.5
+    np.sin(b, out=b)
+    np.square(b, out=b)
+    b *= np.cos(lat2_rad, out=lat2_rad)
+    b *= math.cos(lat1_rad)
+    a += b
+    np.clip(a, 0.0, 1.0, out=a)
+    np.sqrt(a, out=a)
+    np.arcsin(a, out=a)
+    a *= 2.0 * R
+    return a
+
+
 def azimuth(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Calculate azimuth from point 1 to point 2 in degrees (0-360)."""
-    lat1_rad = np.radians(lat1)
-    lat2_rad = np.radians(lat2)
-    dlon = np.radians(lon2 - lon1)
-    x = np.sin(dlon) * np.cos(lat2_rad)
-    y = np.cos(lat1_rad) * np.sin(lat2_rad) - np.sin(lat1_rad) * np.cos(
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    dlon = math.radians(lon2 - lon1)
+    x = math.sin(dlon) * math.cos(lat2_rad)
+    y = math.cos(lat1_rad) * math.sin(lat2_rad) - math.sin(lat1_rad) * math.cos(
         lat2_rad
-    ) * np.cos(dlon)
+    ) * math.cos(dlon)
+    az = math.degrees(math.atan2(x, y))
+    return (az + 360) % 360
+
+
+def azimuth_batch(
+    lat1: float, lon1: float, lats2: np.ndarray, lons2: np.ndarray
+) -> np.ndarray:
+    """Calculate azimuths in degrees (0-360) from one point to many points."""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = np.radians(np.asarray(lats2, dtype=np.float64))
+    dlon = np.radians(np.asarray(lons2, dtype=np.float64) - lon1)
+    cos_lat2 = np.cos(lat2_rad)
+    x = np.sin(dlon) * cos_lat2
+    y = math.cos(lat1_rad) * np.sin(lat2_rad) - math.sin(lat1_rad) * cos_lat2 * np.cos(
+        dlon
+    )
     az = np.degrees(np.arctan2(x, y))
     return (az + 360) % 360
 
 
 def compute_travel_time(distance_km: float, depth_km: float, vp_km_s: float) -> float:
     """Compute P-wave travel time in seconds using straight-line path."""
-    hypocentral_distance = np.sqrt(distance_km**2 + depth_km**2)
+    hypocentral_distance = math.sqrt(distance_km**2 + depth_km**2)
     return hypocentral_distance / vp_km_s
 
 
 def compute_travel_time_s(distance_km: float, depth_km: float, vs_km_s: float) -> float:
     """Compute S-wave travel time in seconds using straight-line path."""
-    hypocentral_distance = np.sqrt(distance_km**2 + depth_km**2)
+    hypocentral_distance = math.sqrt(distance_km**2 + depth_km**2)
     return hypocentral_distance / vs_km_s
 
 
@@ -45,23 +91,16 @@ def azimuthal_gap(station_azimuths: list[float]) -> float:
     """Calculate largest azimuthal gap."""
     if len(station_azimuths) < 2:
         return 360.0
-    sorted_az = sorted(station_azimuths)
-    gaps = [sorted_az[i + 1] - sorted_az[i] for i in range(len(sorted_az) - 1)]
-    gaps.append(360.0 + sorted_az[0] - sorted_az[-1])
-    return max(gaps)
+    az = np.sort(np.asarray(station_azimuths, dtype=np.float64))
+    wrap = 360.0 + az[0] - az[-1]
+    return max(float(np.diff(az).max()), float(wrap))
 
 
 def secondary_azimuthal_gap(station_azimuths: list[float]) -> float:
     """Calculate secondary azimuthal gap."""
     if len(station_azimuths) < 3:
         return 360.0
-    sorted_az = sorted(station_azimuths)
-    gaps = []
-    for i in range(len(sorted_az)):
-        next_i = (i + 2) % len(sorted_az)
-        if next_i > i:
-            gap = sorted_az[next_i] - sorted_az[i]
-        else:
-            gap = 360.0 + sorted_az[next_i] - sorted_az[i]
-        gaps.append(gap)
-    return max(gaps)
+    az = np.sort(np.asarray(station_azimuths, dtype=np.float64))
+    gaps = np.roll(az, -2) - az
+    gaps[-2:] += 360.0
+    return float(gaps.max())
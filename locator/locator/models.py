@@ -1,8 +1,10 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 
+import numpy as np
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Station:
     net: str
     sta: str
@@ -10,13 +12,17 @@ class Station:
     lat: float
     lon: float
     elev_m: float = 0.0
+    _station_key: tuple[str, str, str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_station_key", (self.net, self.sta, self.loc))
 
     @property
     def station_key(self) -> tuple[str, str, str]:
-        return (self.net, self.sta, self.loc)
+        return self._station_key
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Pick:
     id: int
     ts: datetime
@@ -26,20 +32,27 @@ class Pick:
     loc: str
     chan: str
     score: float | None = None
+    _station_key: tuple[str, str, str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_station_key", (self.net, self.sta, self.loc))
 
     @property
     def station_key(self) -> tuple[str, str, str]:
-        return (self.net, self.sta, self.loc)
+        return self._station_key
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Event:
     picks: list[Pick]
     earliest_pick_time: datetime
     association_key: str
+    # Optional arrays aligned with picks, filled by solver.index_event_picks.
+    pick_epochs: np.ndarray | None = field(default=None, compare=False)
+    sta_idx: np.ndarray | None = field(default=None, compare=False)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ArrivalResidual:
     pick: Pick
     distance_km: float
@@ -48,7 +61,7 @@ class ArrivalResidual:
     residual_seconds: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class OriginEstimate:
     association_key: str
     origin_ts: datetime
@@ -1,5 +1,5 @@
 import argparse
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 
 
 @dataclass
@@ -11,6 +11,7 @@ class Settings:
     min_pick_score: float = 0.0
     vp_km_s: float = 6.0
     max_residual_seconds: float = 3.0
+    workers: int = 1
     log_level: str = "INFO"
     pg_host: str = "localhost"
     pg_port: int = 5432
@@ -28,26 +29,20 @@ def parse_args() -> Settings:
     parser.add_argument("--min-pick-score", type=float, default=0.0)
     parser.add_argument("--vp-km-s", type=float, default=6.0)
     parser.add_argument("--max-residual-seconds", type=float, default=3.0)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to solve events in parallel (1 = in-process)",
+    )
     parser.add_argument("--log-level", default="INFO")
     parser.add_argument("--pg-host", default="localhost")
     parser.add_argument("--pg-port", type=int, default=5432)
     parser.add_argument("--pg-user", default="seis")
     parser.add_argument("--pg-password", default="seis")
-    parser.add_argument("--pg-db", default="seismic")
+    parser.add_argument("--pg-db", dest="pg_dbname", default="seismic")
     args = parser.parse_args()
 
-    return Settings(
-        poll_seconds=args.poll_seconds,
-        lookback_seconds=args.lookback_seconds,
-        association_window_seconds=args.association_window_seconds,
-        min_stations=args.min_stations,
-        min_pick_score=args.min_pick_score,
-        vp_km_s=args.vp_km_s,
-        max_residual_seconds=args.max_residual_seconds,
-        log_level=args.log_level.upper(),
-        pg_host=args.pg_host,
-        pg_port=args.pg_port,
-        pg_user=args.pg_user,
-        pg_password=args.pg_password,
-        pg_dbname=args.pg_db,
-    )
+    kwargs = {f.name: getattr(args, f.name) for f in fields(Settings)}
+    kwargs["log_level"] = kwargs["log_level"].upper()
+    return Settings(**kwargs)
@@ -1,13 +1,87 @@
 import logging
-from datetime import datetime, timezone
+import math
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
 
 import numpy as np
 
-from .geometry import azimuth, azimuthal_gap, compute_travel_time, haversine_distance
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba is an optional accelerator
+    njit = None
+
+from .geometry import (
+    EARTH_RADIUS_KM,
+    azimuth_batch,
+    azimuthal_gap,
+    haversine_distance_batch,
+)
 from .models import ArrivalResidual, Event, OriginEstimate, Pick, Station
 
 logger = logging.getLogger(__name__)
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True, slots=True)
+class StationTable:
+    """Station coordinates as contiguous arrays, addressed through index."""
+
+    # Holding the dict keeps its id() from being reused while cached.
+    stations: dict[tuple[str, str, str], Station]
+    index: dict[tuple[str, str, str], int]
+    lat: np.ndarray
+    lon: np.ndarray
+    lat_rad: np.ndarray
+    lon_rad: np.ndarray
+    cos_lat: np.ndarray
+
+
+_station_cache: dict[int, StationTable] = {}
+
+
+def clear_station_cache() -> None:
+    """Drop cached station tables, e.g. after station metadata is reloaded."""
+    _station_cache.clear()
+
+
+def station_table(stations: dict[tuple[str, str, str], Station]) -> StationTable:
+    """Return the (cached) array view of a station dict."""
+    cached = _station_cache.get(id(stations))
+    if cached is not None and cached.stations is stations:
+        return cached
+
+    lat = np.array([station.lat for station in stations.values()], dtype=np.float64)
+    lon = np.array([station.lon for station in stations.values()], dtype=np.float64)
+    lat_rad = np.radians(lat)
+    table = StationTable(
+        stations=stations,
+        index={key: i for i, key in enumerate(stations)},
+        lat=lat,
+        lon=lon,
+        lat_rad=lat_rad,
+        lon_rad=np.radians(lon),
+        cos_lat=np.cos(lat_rad),
+    )
+    # The locator keeps one station dict alive at a time.
+    _station_cache.clear()
+    _station_cache[id(stations)] = table
+    return table
+
+
+def index_event_picks(event: Event, table: StationTable) -> Event:
+    """Attach pick epochs and station-table indices (-1 if unknown) to an event."""
+    count = len(event.picks)
+    pick_epochs = np.fromiter(
+        (pick.ts.timestamp() for pick in event.picks), dtype=np.float64, count=count
+    )
+    sta_idx = np.fromiter(
+        (table.index.get(pick.station_key, -1) for pick in event.picks),
+        dtype=np.intp,
+        count=count,
+    )
+    return replace(event, pick_epochs=pick_epochs, sta_idx=sta_idx)
+
 
 def estimate_origin(
     event: Event,
@@ -16,6 +90,9 @@ def estimate_origin(
     min_stations: int = 4,
     max_depth_km: float = 80.0,
     max_iterations: int = 30,
+    ftol: float = 1e-6,
+    gtol: float = 1e-8,
+    residual_dtype: type[np.floating] = np.float32,
 ) -> OriginEstimate | None:
     logger.info(
         "Starting origin estimation: association_key=%s picks=%d min_stations=%d vp_km_s=%.3f",
@@ -29,23 +106,23 @@ def estimate_origin(
     if min_stations < 3:
         raise ValueError("min_stations must be >= 3")
 
-    picks: list[Pick] = []
-    station_list: list[Station] = []
-    pick_epochs: list[float] = []
-    for pick in event.picks:
-        station = stations.get(pick.station_key)
-        if station is None:
-            logger.warning(
-                "Skipping pick with missing station metadata: pick_id=%s station=%s.%s.%s",
-                pick.id,
-                pick.net,
-                pick.sta,
-                pick.loc,
-            )
-            continue
-        picks.append(pick)
-        station_list.append(station)
-        pick_epochs.append(pick.ts.timestamp())
+    table = station_table(stations)
+    if event.pick_epochs is None or event.sta_idx is None:
+        event = index_event_picks(event, table)
+    known = event.sta_idx >= 0
+    for i in np.flatnonzero(~known):
+        pick = event.picks[i]
+        logger.warning(
+            "Skipping pick with missing station metadata: pick_id=%s station=%s.%s.%s",
+            pick.id,
+            pick.net,
+            pick.sta,
+            pick.loc,
+        )
+    keep = np.flatnonzero(known)
+    picks: list[Pick] = [event.picks[i] for i in keep]
+    sta_idx = event.sta_idx[keep]
+    epochs = event.pick_epochs[keep]
 
     if len(picks) < min_stations:
         logger.info(
@@ -55,95 +132,145 @@ def estimate_origin(
         )
         return None
 
+    sta_lats = table.lat[sta_idx]
+    sta_lons = table.lon[sta_idx]
+    sta_lat_rad = table.lat_rad[sta_idx]
+    sta_lon_rad = table.lon_rad[sta_idx]
+    cos_sta_lat = table.cos_lat[sta_idx]
+
     # Picks should be sorted at this point...
-    first_pick = picks[0]
-    first_station = stations[first_pick.station_key]
-    lat0 = float(first_station.lat)
-    lon0 = float(first_station.lon)
+    lat0 = float(sta_lats[0])
+    lon0 = float(sta_lons[0])
 
     depth0 = 10.0
-    origin0 = float(min(pick_epochs) - 2.0)
+    first_epoch = float(epochs.min())
+    last_epoch = float(epochs.max())
+    origin0 = first_epoch - 2.0
     x = np.array([lat0, lon0, depth0, origin0], dtype=float)
 
-    min_epoch = min(pick_epochs) - 300.0
-    max_epoch = max(pick_epochs) + 300.0
+    min_epoch = first_epoch - 300.0
+    max_epoch = last_epoch + 300.0
     lower = np.array([-90.0, -180.0, 0.0, min_epoch], dtype=float)
     upper = np.array([90.0, 180.0, max_depth_km, max_epoch], dtype=float)
 
-    def residuals(params: np.ndarray) -> np.ndarray:
+    # Residuals are evaluated in residual_dtype on times relative to the first
+    # pick (float32 cannot hold absolute epochs to the millisecond). x, the
+    # Jacobian and the normal equations stay in float64.
+    rel_epochs = (epochs - first_epoch).astype(residual_dtype)
+    kernel_lat_rad = sta_lat_rad.astype(residual_dtype)
+    kernel_lon_rad = sta_lon_rad.astype(residual_dtype)
+    kernel_cos_lat = cos_sta_lat.astype(residual_dtype)
+
+    def residuals(params: np.ndarray, out: np.ndarray) -> np.ndarray:
         lat, lon, depth_km, origin_epoch = params
-        out: list[float] = []
-        for station, observed_epoch in zip(station_list, pick_epochs):
-            distance_km = haversine_distance(lat, lon, station.lat, station.lon)
-            tt_pred = compute_travel_time(distance_km, depth_km, vp_km_s)
-            out.append(observed_epoch - (origin_epoch + tt_pred))
-        return np.asarray(out, dtype=float)
+        return _residuals(
+            lat,
+            lon,
+            depth_km,
+            origin_epoch - first_epoch,
+            kernel_lat_rad,
+            kernel_lon_rad,
+            kernel_cos_lat,
+            rel_epochs,
+            vp_km_s,
+            out,
+        )
 
+    # Levenberg-Marquardt: raise the damping until a step lowers the RMS and
+    # relax it after every accepted step. Retries reuse J and r.
+    lam = 1e-3
+    identity = np.eye(x.size)
+    # Two residual buffers: r holds the accepted point, r_try the trial one.
+    r = residuals(x, np.empty(epochs.size, dtype=residual_dtype))
+    r_try = np.empty(epochs.size, dtype=residual_dtype)
+    jac = np.empty((epochs.size, x.size), dtype=float)
+    rms0 = float(np.sqrt(np.mean(r * r)))
     for _ in range(max_iterations):
-        r = residuals(x)
-        rms0 = float(np.sqrt(np.mean(r * r)))
         logger.debug(
-            "Iteration: association_key=%s rms=%.6f lat=%.5f lon=%.5f depth=%.3f",
+            "Iteration: association_key=%s rms=%.6f lat=%.5f lon=%.5f depth=%.3f lambda=%.3g",
             event.association_key,
             rms0,
             x[0],
             x[1],
             x[2],
+            lam,
         )
-        jac = _finite_difference_jacobian(residuals, x)
-        try:
-            dx, *_ = np.linalg.lstsq(jac, -r, rcond=None)
-        except np.linalg.LinAlgError:
-            logger.exception(
-                "Linear solve failed for association_key=%s",
+        _analytic_jacobian(x, sta_lat_rad, sta_lon_rad, cos_sta_lat, vp_km_s, out=jac)
+        jtj = jac.T @ jac
+        jtr = jac.T @ r.astype(np.float64)
+        if float(np.max(np.abs(jtr))) < gtol:
+            logger.debug(
+                "Stopping iterations: association_key=%s gradient below gtol",
                 event.association_key,
             )
-            return None
+            break
 
         improved = False
-        alpha = 1.0
         for _ in range(8):
-            x_try = np.clip(x + alpha * dx, lower, upper)
-            r_try = residuals(x_try)
+            try:
+                dx = np.linalg.solve(jtj + lam * identity, -jtr)
+            except np.linalg.LinAlgError:
+                logger.exception(
+                    "Linear solve failed for association_key=%s",
+                    event.association_key,
+                )
+                return None
+            x_try = np.clip(x + dx, lower, upper)
+            residuals(x_try, r_try)
             rms_try = float(np.sqrt(np.mean(r_try * r_try)))
             if rms_try < rms0:
                 x = x_try
+                r, r_try = r_try, r
+                rms_prev, rms0 = rms0, rms_try
                 improved = True
+                lam *= 0.3
                 break
-            alpha *= 0.5
-        if not improved or np.linalg.norm(alpha * dx) < 1e-5:
+            lam *= 10.0
+        if improved and rms_prev - rms0 < ftol * max(1.0, rms0):
             logger.debug(
-                "Stopping iterations: association_key=%s improved=%s step_norm=%.8f",
+                "Stopping iterations: association_key=%s rms change below ftol",
                 event.association_key,
-                improved,
-                float(np.linalg.norm(alpha * dx)),
             )
             break
+        # Compare the squared step against (1e-5)**2 to skip the sqrt.
+        if not improved or float(dx @ dx) < 1e-10:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Stopping iterations: association_key=%s improved=%s step_norm=%.8f",
+                    event.association_key,
+                    improved,
+                    math.sqrt(float(dx @ dx)),
+                )
+            break
 
+    # r and rms0 always describe the accepted x.
     lat, lon, depth_km, origin_epoch = x
-    final_residuals = residuals(x)
-    rms = float(np.sqrt(np.mean(final_residuals * final_residuals)))
-
-    arrivals: list[ArrivalResidual] = []
-    azimuths: list[float] = []
-    for pick, station, residual in zip(picks, station_list, final_residuals):
-        distance_km = haversine_distance(lat, lon, station.lat, station.lon)
-        az = azimuth(lat, lon, station.lat, station.lon)
-        tt_pred = compute_travel_time(distance_km, depth_km, vp_km_s)
-        arrivals.append(
-            ArrivalResidual(
-                pick=pick,
-                distance_km=float(distance_km),
-                azimuth_deg=float(az),
-                predicted_tt_seconds=float(tt_pred),
-                residual_seconds=float(residual),
-            )
+    final_residuals = r
+    rms = rms0
+
+    distances_km = haversine_distance_batch(lat, lon, sta_lats, sta_lons)
+    azimuths = azimuth_batch(lat, lon, sta_lats, sta_lons)
+    tt_preds = np.sqrt(distances_km * distances_km + depth_km * depth_km) / vp_km_s
+    arrivals = [
+        ArrivalResidual(
+            pick=pick,
+            distance_km=distance_km,
+            azimuth_deg=az,
+            predicted_tt_seconds=tt_pred,
+            residual_seconds=residual,
+        )
+        for pick, distance_km, az, tt_pred, residual in zip(
+            picks,
+            distances_km.tolist(),
+            azimuths.tolist(),
+            tt_preds.tolist(),
+            final_residuals.tolist(),
         )
-        azimuths.append(float(az))
+    ]
 
     result = OriginEstimate(
         association_key=event.association_key,
-        origin_ts=datetime.fromtimestamp(float(origin_epoch), tz=timezone.utc),
+        origin_ts=_EPOCH + timedelta(seconds=float(origin_epoch)),
         lat=float(lat),
         lon=float(lon),
         depth_km=float(depth_km),
@@ -165,15 +292,104 @@ def estimate_origin(
     return result
 
 
-def _finite_difference_jacobian(
-    residual_fn,
+def _residuals_numpy(
+    lat: float,
+    lon: float,
+    depth_km: float,
+    origin_epoch: float,
+    sta_lat_rad: np.ndarray,
+    sta_lon_rad: np.ndarray,
+    cos_sta_lat: np.ndarray,
+    epochs: np.ndarray,
+    vp_km_s: float,
+    out: np.ndarray,
+) -> np.ndarray:
+    lat_rad = math.radians(lat)
+    lon_rad = math.radians(lon)
+    cos_lat = math.cos(lat_rad)
+    dlat = sta_lat_rad - lat_rad
+    dlon = sta_lon_rad - lon_rad
+    a = np.sin(dlat / 2) ** 2 + cos_lat * cos_sta_lat * np.sin(dlon / 2) ** 2
+    distance_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    tt_pred = np.sqrt(distance_km * distance_km + depth_km * depth_km) / vp_km_s
+    return np.subtract(epochs, origin_epoch + tt_pred, out=out)
+
+
+def _residuals_loop(
+    lat: float,
+    lon: float,
+    depth_km: float,
+    origin_epoch: float,
+    sta_lat_rad: np.ndarray,
+    sta_lon_rad: np.ndarray,
+    cos_sta_lat: np.ndarray,
+    epochs: np.ndarray,
+    vp_km_s: float,
+    out: np.ndarray,
+) -> np.ndarray:
+    # Same model as _residuals_numpy written as one pass over the stations, so
+    # that numba can keep every intermediate in registers and write each
+    # residual straight into the caller's buffer. Station counts are far too
+    # small for a parallel (prange) loop to pay for its thread dispatch.
+    lat_rad = math.radians(lat)
+    lon_rad = math.radians(lon)
+    cos_lat = math.cos(lat_rad)
+    depth_sq = depth_km * depth_km
+    for i in range(epochs.size):
+        sin_half_dlat = math.sin((sta_lat_rad[i] - lat_rad) / 2)
+        sin_half_dlon = math.sin((sta_lon_rad[i] - lon_rad) / 2)
+        a = (
+            sin_half_dlat * sin_half_dlat
+            + cos_lat * cos_sta_lat[i] * sin_half_dlon * sin_half_dlon
+        )
+        distance_km = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+        tt_pred = math.sqrt(distance_km * distance_km + depth_sq) / vp_km_s
+        out[i] = epochs[i] - (origin_epoch + tt_pred)
+    return out
+
+
+if njit is None:
+    _residuals = _residuals_numpy
+else:
+    _residuals = njit(cache=True, fastmath=True)(_residuals_loop)
+
+
+def _analytic_jacobian(
     x: np.ndarray,
+    sta_lat_rad: np.ndarray,
+    sta_lon_rad: np.ndarray,
+    cos_sta_lat: np.ndarray,
+    vp_km_s: float,
+    out: np.ndarray | None = None,
 ) -> np.ndarray:
-    base = residual_fn(x)
-    jac = np.zeros((base.size, x.size), dtype=float)
-    steps = np.array([1e-4, 1e-4, 1e-3, 1e-3], dtype=float)
-    for i in range(x.size):
-        x2 = x.copy()
-        x2[i] += steps[i]
-        jac[:, i] = (residual_fn(x2) - base) / steps[i]
+    """Partial derivatives of the residuals w.r.t. (lat, lon, depth, origin)."""
+    lat, lon, depth_km, _ = x
+    lat_rad = math.radians(lat)
+    lon_rad = math.radians(lon)
+    sin_lat = math.sin(lat_rad)
+    cos_lat = math.cos(lat_rad)
+    dlat = sta_lat_rad - lat_rad
+    dlon = sta_lon_rad - lon_rad
+    sin_half_dlon_sq = np.sin(dlon / 2) ** 2
+    a = np.sin(dlat / 2) ** 2 + cos_lat * cos_sta_lat * sin_half_dlon_sq
+    central_angle = 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    distance_km = EARTH_RADIUS_KM * central_angle
+    hypo_km = np.maximum(np.sqrt(distance_km * distance_km + depth_km * depth_km), 1e-9)
+
+    # d(tt)/d(a) = distance / (hypo * vp) * 2R / sin(c); written via c / sin(c),
+    # which tends to 1 when the trial epicentre sits on a station.
+    sin_c = np.sin(central_angle)
+    c_over_sin_c = np.divide(
+        central_angle, sin_c, out=np.ones_like(sin_c), where=sin_c > 1e-12
+    )
+    dtt_da = 2 * EARTH_RADIUS_KM**2 * c_over_sin_c / (hypo_km * vp_km_s)
+    da_dlat = -0.5 * np.sin(dlat) - sin_lat * cos_sta_lat * sin_half_dlon_sq
+    da_dlon = -0.5 * cos_lat * cos_sta_lat * np.sin(dlon)
+
+    # residual = observed - (origin + tt), so every travel-time term is negated.
+    jac = np.empty((sta_lat_rad.size, 4), dtype=float) if out is None else out
+    jac[:, 0] = -dtt_da * da_dlat * (np.pi / 180.0)
+    jac[:, 1] = -dtt_da * da_dlon * (np.pi / 180.0)
+    jac[:, 2] = -depth_km / (hypo_km * vp_km_s)
+    jac[:, 3] = -1.0
     return jac
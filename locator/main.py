@@ -1,24 +1,46 @@
 import logging
+import multiprocessing
 import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
 
 from locator.associator import associate_picks
 from locator.db import (
     connect,
     fetch_recent_picks,
     fetch_stations,
-    replace_origin_arrivals,
-    upsert_origin,
+    save_origin,
 )
 from locator.settings import parse_args
-from locator.solver import estimate_origin
+from locator.solver import (
+    clear_station_cache,
+    estimate_origin,
+    index_event_picks,
+    station_table,
+)
 
+# Below this many events per cycle, pickling work out to the pool costs more
+# than solving in-process.
+PARALLEL_MIN_EVENTS = 4
 
-def run_cycle(conn, settings, stations: dict, logger: logging.Logger):
-    picks = fetch_recent_picks(conn, lookback_seconds=settings.lookback_seconds)
+
+def run_cycle(
+    conn,
+    settings,
+    stations: dict,
+    logger: logging.Logger,
+    executor: Executor | None = None,
+):
+    picks = fetch_recent_picks(
+        conn,
+        lookback_seconds=settings.lookback_seconds,
+        min_score=settings.min_pick_score,
+    )
 
     if picks and any(pick.station_key not in stations for pick in picks):
         logger.info("Refreshing station cache due to unknown station in picks")
         stations = fetch_stations(conn)
+        clear_station_cache()
 
     events = associate_picks(
         picks,
@@ -28,14 +50,23 @@ def run_cycle(conn, settings, stations: dict, logger: logging.Logger):
         min_score=settings.min_pick_score,
     )
 
+    table = station_table(stations)
+    events = [index_event_picks(event, table) for event in events]
+
+    solve = partial(
+        estimate_origin,
+        stations=stations,
+        vp_km_s=settings.vp_km_s,
+        min_stations=settings.min_stations,
+    )
+    if executor is not None and len(events) >= PARALLEL_MIN_EVENTS:
+        estimates = executor.map(solve, events)
+    else:
+        estimates = map(solve, events)
+
+    # Database writes stay on this process; the connection is not fork-safe.
     solved = 0
-    for event in events:
-        estimate = estimate_origin(
-            event,
-            stations=stations,
-            vp_km_s=settings.vp_km_s,
-            min_stations=settings.min_stations,
-        )
+    for estimate in estimates:
         if estimate is None:
             continue
         if estimate.rms_seconds > settings.max_residual_seconds:
@@ -46,8 +77,7 @@ def run_cycle(conn, settings, stations: dict, logger: logging.Logger):
                 settings.max_residual_seconds,
             )
             continue
-        origin_id = upsert_origin(conn, estimate)
-        replace_origin_arrivals(conn, origin_id, estimate)
+        save_origin(conn, estimate)
         solved += 1
 
     logger.info(
@@ -65,37 +95,58 @@ def run_cycle(conn, settings, stations: dict, logger: logging.Logger):
     }
 
 
-def main() -> None:
-    settings = parse_args()
+def _configure_logging(log_level: str) -> None:
     logging.basicConfig(
-        level=settings.log_level,
+        level=log_level,
         format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
     )
+
+
+def main() -> None:
+    settings = parse_args()
+    _configure_logging(settings.log_level)
     logger = logging.getLogger("locator.main")
     logger.info("Starting locator service")
 
-    try:
-        conn = connect(settings)
-    except Exception:
-        logger.exception("Failed to connect to PostgreSQL")
-        return
+    executor = None
+    if settings.workers > 1:
+        # forkserver children never inherit the PostgreSQL socket.
+        executor = ProcessPoolExecutor(
+            max_workers=settings.workers,
+            mp_context=multiprocessing.get_context("forkserver"),
+            initializer=_configure_logging,
+            initargs=(settings.log_level,),
+        )
+        logger.info("Solving events with %d worker processes", settings.workers)
 
     try:
-        stations = fetch_stations(conn)
-        logger.info("Loaded stations: count=%d", len(stations))
-    except Exception:
-        logger.exception("Failed to load stations")
-        return
+        try:
+            conn = connect(settings)
+        except Exception:
+            logger.exception("Failed to connect to PostgreSQL")
+            return
 
-    try:
-        while True:
-            try:
-                stations, _metrics = run_cycle(conn, settings, stations, logger)
-            except Exception:
-                logger.exception("Locator cycle failed")
-            time.sleep(settings.poll_seconds)
-    except KeyboardInterrupt:
-        logger.info("Stopping locator service")
+        try:
+            stations = fetch_stations(conn)
+            logger.info("Loaded stations: count=%d", len(stations))
+        except Exception:
+            logger.exception("Failed to load stations")
+            return
+
+        try:
+            while True:
+                try:
+                    stations, _metrics = run_cycle(
+                        conn, settings, stations, logger, executor
+                    )
+                except Exception:
+                    logger.exception("Locator cycle failed")
+                time.sleep(settings.poll_seconds)
+        except KeyboardInterrupt:
+            logger.info("Stopping locator service")
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
 
 
 if __name__ == "__main__":
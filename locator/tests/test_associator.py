@@ -1,6 +1,8 @@
 import hashlib
 from datetime import datetime, timedelta, timezone, UTC
 
+import numpy as np
+
 from locator.associator import associate_picks
 from locator.models import Pick
 
@@ -34,7 +36,8 @@ def test_associate_picks_single_event() -> None:
     assert len(events) == 1
     assert [p.id for p in events[0].picks] == [1, 2, 3, 4]
     assert events[0].earliest_pick_time == t0
-    expected = hashlib.sha256("1_2_3_4".encode("utf-8")).hexdigest()
+    ids = np.array([1, 2, 3, 4], dtype="<i8")
+    expected = hashlib.blake2b(ids.tobytes(), digest_size=32).hexdigest()
     assert events[0].association_key == expected
 
 
@@ -142,3 +145,19 @@ def test_associate_picks_accepts_missing_score_with_warning(caplog) -> None:
     assert len(events) == 1
     assert [p.id for p in events[0].picks] == [1, 2, 3, 4]
     assert "has no score; accepting pick despite score filter" in caplog.text
+
+
+def test_associate_picks_window_includes_pick_on_boundary() -> None:
+    t0 = datetime(2026, 2, 27, 12, 0, tzinfo=timezone.utc)
+    picks = [
+        _pick(1, t0 + timedelta(seconds=0.0), "STA1"),
+        _pick(2, t0 + timedelta(seconds=2.0), "STA2"),
+        _pick(3, t0 + timedelta(seconds=4.0), "STA3"),
+        _pick(4, t0 + timedelta(seconds=5.0), "STA4"),
+        _pick(5, t0 + timedelta(seconds=5.001), "STA5"),
+    ]
+
+    events = associate_picks(picks, window_seconds=5.0, min_stations=4, min_phases=4)
+
+    assert len(events) == 1
+    assert [p.id for p in events[0].picks] == [1, 2, 3, 4]
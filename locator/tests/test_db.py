@@ -1,14 +1,17 @@
 from datetime import datetime, timezone
 
 from locator.db import (
+    connect,
     fetch_picks_since,
     fetch_recent_picks,
     fetch_stations,
     replace_origin_arrivals,
+    save_origin,
     set_origin_final,
     upsert_origin,
 )
 from locator.models import ArrivalResidual, OriginEstimate, Pick
+from locator.settings import Settings
 
 
 class _FakeCursor:
@@ -42,10 +45,41 @@ class _FakeCursor:
 class _FakeConn:
     def __init__(self, fetchall_rows=None, fetchone_rows=None):
         self.cursor_obj = _FakeCursor(fetchall_rows, fetchone_rows)
+        self.transactions = 0
 
     def cursor(self):
         return self.cursor_obj
 
+    def __enter__(self):
+        self.transactions += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+def test_connect_prepares_statements(monkeypatch) -> None:
+    fake_conn = _FakeConn()
+    monkeypatch.setattr("psycopg2.connect", lambda **_kwargs: fake_conn)
+
+    conn = connect(Settings())
+
+    assert conn is fake_conn
+    assert conn.autocommit is True
+    prepared = {query.split()[1]: query for query, _ in conn.cursor_obj.executed}
+    assert set(prepared) == {
+        "fetch_recent_picks",
+        "fetch_picks_since",
+        "upsert_origin",
+        "set_origin_final",
+    }
+    assert "p.ts >= $1" in prepared["fetch_recent_picks"]
+    assert "p.ts > $1" in prepared["fetch_picks_since"]
+    assert "UPPER(p.phase) = 'P'" in prepared["fetch_picks_since"]
+    assert "p.score IS NULL OR p.score >= $2" in prepared["fetch_picks_since"]
+    assert "ON CONFLICT (association_key)" in prepared["upsert_origin"]
+    assert "SET status = 'final'" in prepared["set_origin_final"]
+
 
 def test_fetch_stations_maps_by_station_key() -> None:
     conn = _FakeConn(
@@ -75,22 +109,23 @@ def test_fetch_recent_picks_maps_rows() -> None:
     assert picks[0].id == 1
     assert picks[1].chan == "EHZ"
     assert picks[1].score is None
-    assert len(conn.cursor_obj.last_params) == 1
+    assert len(conn.cursor_obj.last_params) == 2
     assert isinstance(conn.cursor_obj.last_params[0], datetime)
     assert conn.cursor_obj.last_params[0].tzinfo is not None
-    assert "UPPER(p.phase) = 'P'" in conn.cursor_obj.last_query
+    assert conn.cursor_obj.last_params[1] == 0.0
+    assert conn.cursor_obj.last_query.startswith("EXECUTE fetch_recent_picks")
 
 
 def test_fetch_picks_since_uses_strictly_newer_timestamp() -> None:
     since_ts = datetime(2026, 2, 27, 12, 0, tzinfo=timezone.utc)
     conn = _FakeConn(fetchall_rows=[(3, since_ts, "P", "AA", "STA3", "", "HHZ", 0.6)])
 
-    picks = fetch_picks_since(conn, since_ts=since_ts)
+    picks = fetch_picks_since(conn, since_ts=since_ts, min_score=0.5)
 
     assert len(picks) == 1
     assert picks[0].id == 3
-    assert conn.cursor_obj.last_params == (since_ts,)
-    assert "p.ts > %s" in conn.cursor_obj.last_query
+    assert conn.cursor_obj.last_params == (since_ts, 0.5)
+    assert conn.cursor_obj.last_query.startswith("EXECUTE fetch_picks_since")
 
 
 def test_upsert_origin_returns_origin_id() -> None:
@@ -120,11 +155,11 @@ def test_upsert_origin_returns_origin_id() -> None:
     origin_id = upsert_origin(conn, estimate)
 
     assert origin_id == 42
-    assert "ON CONFLICT (association_key)" in conn.cursor_obj.last_query
+    assert conn.cursor_obj.last_query.startswith("EXECUTE upsert_origin")
     assert conn.cursor_obj.last_params[-1] == "abc123"
 
 
-def test_replace_origin_arrivals_deletes_then_inserts() -> None:
+def test_replace_origin_arrivals_deletes_then_inserts(monkeypatch) -> None:
     now = datetime(2026, 2, 27, 12, 0, tzinfo=timezone.utc)
     pick1 = Pick(1, now, "P", "AA", "STA1", "", "HHZ", 0.9)
     pick2 = Pick(2, now, "P", "AA", "STA2", "", "HHZ", 0.8)
@@ -155,16 +190,64 @@ def test_replace_origin_arrivals_deletes_then_inserts() -> None:
         ],
     )
     conn = _FakeConn()
+    batches = []
+
+    def _fake_execute_values(cur, query, rows, page_size):
+        batches.append((query, rows, page_size))
+
+    monkeypatch.setattr("psycopg2.extras.execute_values", _fake_execute_values)
 
     replace_origin_arrivals(conn, origin_id=7, estimate=estimate)
 
-    assert len(conn.cursor_obj.executed) == 3
+    assert len(conn.cursor_obj.executed) == 1
     assert "DELETE FROM origin_arrivals" in conn.cursor_obj.executed[0][0]
     assert conn.cursor_obj.executed[0][1] == (7,)
-    assert "INSERT INTO origin_arrivals" in conn.cursor_obj.executed[1][0]
-    assert conn.cursor_obj.executed[1][1][0] == 7
-    assert conn.cursor_obj.executed[1][1][1] == 1
-    assert conn.cursor_obj.executed[2][1][1] == 2
+    assert len(batches) == 1
+    query, rows, page_size = batches[0]
+    assert "INSERT INTO origin_arrivals" in query
+    assert "VALUES %s" in query
+    assert page_size == 500
+    assert [row[:2] for row in rows] == [(7, 1), (7, 2)]
+
+
+def test_save_origin_writes_origin_and_arrivals_in_one_transaction(
+    monkeypatch,
+) -> None:
+    now = datetime(2026, 2, 27, 12, 0, tzinfo=timezone.utc)
+    pick = Pick(1, now, "P", "AA", "STA1", "", "HHZ", 0.9)
+    estimate = OriginEstimate(
+        association_key="abc123",
+        origin_ts=now,
+        lat=47.5,
+        lon=19.0,
+        depth_km=8.0,
+        rms_seconds=0.25,
+        azimuthal_gap_deg=180.0,
+        used_stations=1,
+        arrivals=[
+            ArrivalResidual(
+                pick=pick,
+                distance_km=10.0,
+                azimuth_deg=90.0,
+                predicted_tt_seconds=2.0,
+                residual_seconds=0.1,
+            )
+        ],
+    )
+    conn = _FakeConn(fetchone_rows=[(42,)])
+    batches = []
+    monkeypatch.setattr(
+        "psycopg2.extras.execute_values",
+        lambda cur, query, rows, page_size: batches.append(rows),
+    )
+
+    origin_id = save_origin(conn, estimate)
+
+    assert origin_id == 42
+    assert conn.transactions == 1
+    assert conn.cursor_obj.executed[0][0].startswith("EXECUTE upsert_origin")
+    assert conn.cursor_obj.executed[1][1] == (42,)
+    assert batches[0][0][:2] == (42, 1)
 
 
 def test_set_origin_final_returns_true_when_row_updated() -> None:
@@ -173,7 +256,7 @@ def test_set_origin_final_returns_true_when_row_updated() -> None:
     ok = set_origin_final(conn, origin_id=7)
 
     assert ok is True
-    assert "SET status = 'final'" in conn.cursor_obj.last_query
+    assert conn.cursor_obj.last_query.startswith("EXECUTE set_origin_final")
     assert conn.cursor_obj.last_params == (7,)
 
 
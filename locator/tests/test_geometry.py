@@ -1,10 +1,13 @@
+import numpy as np
 import pytest
 from locator.geometry import (
     azimuth,
+    azimuth_batch,
     azimuthal_gap,
     compute_travel_time,
     compute_travel_time_s,
     haversine_distance,
+    haversine_distance_batch,
     secondary_azimuthal_gap,
 )
 
@@ -17,6 +20,16 @@ def test_haversine_distance():
     assert d == pytest.approx(0.0)
 
 
+def test_haversine_distance_batch_matches_scalar():
+    lats = np.array([48.2082, 47.0, 46.1, -33.9])
+    lons = np.array([16.3738, 19.0, 20.5, 151.2])
+    d = haversine_distance_batch(47.4979, 19.0402, lats, lons)
+    expected = [
+        haversine_distance(47.4979, 19.0402, la, lo) for la, lo in zip(lats, lons)
+    ]
+    assert d == pytest.approx(expected)
+
+
 def test_azimuth():
     # North
     az = azimuth(0.0, 0.0, 1.0, 0.0)
@@ -35,6 +48,14 @@ def test_azimuth():
     assert az == pytest.approx(270.0, abs=1.0)
 
 
+def test_azimuth_batch_matches_scalar():
+    lats = np.array([1.0, 0.0, -1.0, 0.0, 47.6])
+    lons = np.array([0.0, 1.0, 0.0, -1.0, 18.9])
+    az = azimuth_batch(0.0, 0.0, lats, lons)
+    expected = [azimuth(0.0, 0.0, la, lo) for la, lo in zip(lats, lons)]
+    assert az == pytest.approx(expected)
+
+
 def test_compute_travel_time():
     # Hypocentral distance = sqrt(100^2 + 10^2) = 100.5 km
     # Travel time = 100.5 / 6 = 16.75 seconds
@@ -1,6 +1,9 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
+import pytest
+
 import main as locator_main
 from locator.models import Pick, Station
 from locator.settings import Settings
@@ -10,7 +13,8 @@ class _DummyConn:
     pass
 
 
-def test_run_cycle_persists_a_solved_event(monkeypatch) -> None:
+@pytest.mark.parametrize("use_executor", [False, True])
+def test_run_cycle_persists_a_solved_event(monkeypatch, use_executor) -> None:
     conn = _DummyConn()
     settings = Settings(
         lookback_seconds=600,
@@ -57,27 +61,30 @@ def test_run_cycle_persists_a_solved_event(monkeypatch) -> None:
 
     persisted = {"origin_ids": [], "estimates": []}
 
-    def _fake_fetch_recent_picks(_conn, lookback_seconds: int):
+    def _fake_fetch_recent_picks(_conn, lookback_seconds: int, min_score: float):
         assert lookback_seconds == 600
+        assert min_score == 0.0
         return picks
 
-    def _fake_upsert_origin(_conn, estimate):
+    def _fake_save_origin(_conn, estimate):
+        assert len(estimate.arrivals) == 4
         persisted["origin_ids"].append(101)
         persisted["estimates"].append(estimate)
         return 101
 
-    def _fake_replace_origin_arrivals(_conn, origin_id: int, estimate):
-        assert origin_id == 101
-        assert len(estimate.arrivals) == 4
-
     monkeypatch.setattr("main.fetch_recent_picks", _fake_fetch_recent_picks)
-    monkeypatch.setattr("main.upsert_origin", _fake_upsert_origin)
-    monkeypatch.setattr(
-        "main.replace_origin_arrivals",
-        _fake_replace_origin_arrivals,
-    )
-
-    updated_stations, metrics = locator_main.run_cycle(conn, settings, stations, logger)
+    monkeypatch.setattr("main.save_origin", _fake_save_origin)
+
+    if use_executor:
+        monkeypatch.setattr("main.PARALLEL_MIN_EVENTS", 1)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            updated_stations, metrics = locator_main.run_cycle(
+                conn, settings, stations, logger, executor
+            )
+    else:
+        updated_stations, metrics = locator_main.run_cycle(
+            conn, settings, stations, logger
+        )
 
     assert updated_stations == stations
     assert metrics["picks"] == 4
@@ -11,6 +11,7 @@ def test_parse_args_defaults(monkeypatch) -> None:
     assert settings.poll_seconds == 5.0
     assert settings.lookback_seconds == 600
     assert settings.min_pick_score == 0.0
+    assert settings.workers == 1
     assert settings.log_level == "INFO"
     assert settings.pg_dbname == "seismic"
 
@@ -29,6 +30,8 @@ def test_parse_args_overrides(monkeypatch) -> None:
             "3",
             "--min-pick-score",
             "0.7",
+            "--workers",
+            "3",
             "--log-level",
             "debug",
             "--pg-db",
@@ -40,5 +43,6 @@ def test_parse_args_overrides(monkeypatch) -> None:
     assert settings.lookback_seconds == 300
     assert settings.min_stations == 3
     assert settings.min_pick_score == 0.7
+    assert settings.workers == 3
     assert settings.log_level == "DEBUG"
     assert settings.pg_dbname == "customdb"
@@ -2,11 +2,25 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
 
+import numpy as np
 import pytest
 
-from locator.geometry import compute_travel_time, haversine_distance
+from locator.geometry import (
+    compute_travel_time,
+    haversine_distance,
+    haversine_distance_batch,
+)
 from locator.models import Event, Pick, Station
-from locator.solver import estimate_origin
+from locator.solver import (
+    _analytic_jacobian,
+    _residuals,
+    _residuals_loop,
+    _residuals_numpy,
+    clear_station_cache,
+    estimate_origin,
+    index_event_picks,
+    station_table,
+)
 
 
 def _make_pick(pid: int, ts: datetime, net: str, sta: str, loc: str = "") -> Pick:
@@ -35,11 +49,14 @@ def test_estimate_origin_recovers_synthetic_solution() -> None:
         ("AA", "STA4", ""): Station("AA", "STA4", "", 47.57, 18.90, 0.0),
     }
 
-    picks: list[Pick] = []
-    for i, (key, station) in enumerate(stations.items(), start=1):
-        dist = haversine_distance(origin_lat, origin_lon, station.lat, station.lon)
-        tt = compute_travel_time(dist, origin_depth, vp)
-        picks.append(_make_pick(i, origin_t + timedelta(seconds=tt), key[0], key[1]))
+    lats = np.array([station.lat for station in stations.values()])
+    lons = np.array([station.lon for station in stations.values()])
+    dists = haversine_distance_batch(origin_lat, origin_lon, lats, lons)
+    tts = np.sqrt(dists * dists + origin_depth * origin_depth) / vp
+    picks = [
+        _make_pick(i, origin_t + timedelta(seconds=tt), key[0], key[1])
+        for i, (key, tt) in enumerate(zip(stations, tts.tolist()), start=1)
+    ]
 
     event = Event(
         picks=picks,
@@ -95,3 +112,128 @@ def test_estimate_origin_returns_none_if_station_metadata_missing() -> None:
         association_key="event-3",
     )
     assert estimate_origin(event, stations, vp_km_s=6.0, min_stations=4) is None
+
+
+def test_analytic_jacobian_matches_finite_differences() -> None:
+    sta_lats = np.array([47.60, 47.50, 47.38, 47.57])
+    sta_lons = np.array([19.05, 19.20, 18.98, 18.90])
+    vp = 6.0
+
+    def residuals(params: np.ndarray) -> np.ndarray:
+        lat, lon, depth_km, origin_epoch = params
+        out = []
+        for sta_lat, sta_lon in zip(sta_lats, sta_lons):
+            dist = haversine_distance(lat, lon, sta_lat, sta_lon)
+            out.append(-(origin_epoch + compute_travel_time(dist, depth_km, vp)))
+        return np.array(out)
+
+    x = np.array([47.45, 19.10, 12.0, 100.0])
+    steps = np.array([1e-6, 1e-6, 1e-5, 1e-5])
+    expected = np.empty((sta_lats.size, 4))
+    for i, step in enumerate(steps):
+        dx = np.zeros(4)
+        dx[i] = step
+        expected[:, i] = (residuals(x + dx) - residuals(x - dx)) / (2 * step)
+
+    jac = _analytic_jacobian(
+        x, np.radians(sta_lats), np.radians(sta_lons), np.cos(np.radians(sta_lats)), vp
+    )
+
+    assert jac == pytest.approx(expected, rel=1e-5, abs=1e-7)
+
+
+@pytest.mark.parametrize("residual_fn", [_residuals, _residuals_loop])
+def test_residual_kernels_match_numpy(residual_fn) -> None:
+    sta_lat_rad = np.radians([47.60, 47.50, 47.38, 47.57])
+    sta_lon_rad = np.radians([19.05, 19.20, 18.98, 18.90])
+    cos_sta_lat = np.cos(sta_lat_rad)
+    epochs = np.array([103.1, 104.2, 103.7, 104.9])
+    args = (
+        47.45,
+        19.10,
+        12.0,
+        100.0,
+        sta_lat_rad,
+        sta_lon_rad,
+        cos_sta_lat,
+        epochs,
+        6.0,
+    )
+    out = np.empty(epochs.size)
+
+    expected = _residuals_numpy(*args, np.empty(epochs.size))
+    assert residual_fn(*args, out) is out
+    assert out == pytest.approx(expected, abs=1e-9)
+
+
+def test_float32_residual_path_matches_float64() -> None:
+    origin_t = datetime(2026, 2, 27, 12, 0, tzinfo=timezone.utc)
+    stations = {
+        ("AA", "STA1", ""): Station("AA", "STA1", "", 47.60, 19.05, 0.0),
+        ("AA", "STA2", ""): Station("AA", "STA2", "", 47.50, 19.20, 0.0),
+        ("AA", "STA3", ""): Station("AA", "STA3", "", 47.38, 18.98, 0.0),
+        ("AA", "STA4", ""): Station("AA", "STA4", "", 47.57, 18.90, 0.0),
+        ("AA", "STA5", ""): Station("AA", "STA5", "", 47.80, 19.40, 0.0),
+    }
+    picks: list[Pick] = []
+    for i, (key, station) in enumerate(stations.items(), start=1):
+        dist = haversine_distance(47.5, 19.05, station.lat, station.lon)
+        # Perturb the picks so the fit ends with non-zero residuals.
+        tt = compute_travel_time(dist, 8.0, 6.0) + 0.05 * (-1) ** i
+        picks.append(_make_pick(i, origin_t + timedelta(seconds=tt), key[0], key[1]))
+    event = Event(
+        picks=picks,
+        earliest_pick_time=min(p.ts for p in picks),
+        association_key="event-1",
+    )
+
+    fp64 = estimate_origin(event, stations, vp_km_s=6.0, residual_dtype=np.float64)
+    fp32 = estimate_origin(event, stations, vp_km_s=6.0, residual_dtype=np.float32)
+
+    assert fp64 is not None and fp32 is not None
+    # float32 radians resolve station positions to ~0.4 m.
+    assert haversine_distance(fp64.lat, fp64.lon, fp32.lat, fp32.lon) < 1e-3
+    assert fp32.depth_km == pytest.approx(fp64.depth_km, abs=1e-3)
+    assert fp32.origin_ts.timestamp() == pytest.approx(
+        fp64.origin_ts.timestamp(), abs=1e-3
+    )
+    assert fp32.rms_seconds == pytest.approx(fp64.rms_seconds, abs=1e-3)
+
+
+def test_station_table_is_cached_per_stations_dict() -> None:
+    stations = {
+        ("AA", "STA1", ""): Station("AA", "STA1", "", 47.60, 19.05, 0.0),
+        ("AA", "STA2", ""): Station("AA", "STA2", "", 47.50, 19.20, 0.0),
+    }
+
+    first = station_table(stations)
+    assert station_table(stations) is first
+    assert first.index == {("AA", "STA1", ""): 0, ("AA", "STA2", ""): 1}
+    assert first.lat_rad == pytest.approx(np.radians([47.60, 47.50]))
+
+    assert station_table(dict(stations)) is not first
+
+    clear_station_cache()
+    assert station_table(stations) is not first
+
+
+def test_index_event_picks_marks_unknown_stations() -> None:
+    t0 = datetime(2026, 2, 27, 12, 0, tzinfo=timezone.utc)
+    stations = {
+        ("AA", "STA1", ""): Station("AA", "STA1", "", 47.60, 19.05, 0.0),
+        ("AA", "STA2", ""): Station("AA", "STA2", "", 47.50, 19.20, 0.0),
+    }
+    event = Event(
+        picks=[
+            _make_pick(1, t0, "AA", "STA2"),
+            _make_pick(2, t0 + timedelta(seconds=1.5), "AA", "STA9"),
+        ],
+        earliest_pick_time=t0,
+        association_key="event-4",
+    )
+
+    indexed = index_event_picks(event, station_table(stations))
+
+    assert indexed.sta_idx.tolist() == [1, -1]
+    assert indexed.pick_epochs.tolist() == [t0.timestamp(), t0.timestamp() + 1.5]
+    assert indexed == event
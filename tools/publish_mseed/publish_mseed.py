@@ -3,12 +3,25 @@ import argparse
 import logging
 import math
 import signal
+import socket
 import time
 
 import pika
 from pymseed import MS3TraceList, system_time
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba is an optional accelerator
+    njit = None
+
+# Records published between two passes over the connection's I/O loop.
+PUBLISH_BATCH_SIZE = 64
+SINE_PERIOD_DEGREES = 360
+SEND_BUFFER_BYTES = 1 << 20
+# Shared by every publish; pika only reads it while building the frame.
+MSEED_PROPERTIES = pika.BasicProperties(content_type="application/vnd.fdsn.mseed")
+
 
 def handle_signal(signum, _frame) -> None:
     global RUNNING
@@ -16,9 +29,15 @@ def handle_signal(signum, _frame) -> None:
     RUNNING = False
 
 
-def sine_generator(start_degree: int, batch_size: int, amplitude: int) -> np.ndarray:
-    angles = np.radians(np.arange(start_degree, start_degree + batch_size))
-    return np.rint(np.sin(angles) * amplitude).astype(int)
+def build_sine_table(amplitude: int) -> np.ndarray:
+    """One period of the sine wave, one sample per degree."""
+    angles = np.radians(np.arange(SINE_PERIOD_DEGREES, dtype=np.float64))
+    return np.rint(np.sin(angles) * amplitude).astype(np.int32)
+
+
+def sine_generator(start_degree: int, batch_size: int, table: np.ndarray) -> np.ndarray:
+    phase = start_degree % SINE_PERIOD_DEGREES
+    return np.take(table, np.arange(phase, phase + batch_size), mode="wrap")
 
 
 def ricker_generator(
@@ -29,14 +48,75 @@ def ricker_generator(
     amplitude: int,
     total_samples: int,
 ) -> np.ndarray:
-    idx = np.arange(start_sample, start_sample + batch_size)
+    out = np.zeros(batch_size, dtype=np.int32)
+    # Only evaluate the wavelet on samples before the end of the event.
+    n_valid = max(0, min(batch_size, total_samples - start_sample))
+    if n_valid == 0:
+        return out
+    idx = np.arange(start_sample, start_sample + n_valid)
     center = total_samples / 2.0
     t = (idx - center) / sample_rate
+    arg = (math.pi * frequency) * t
+    arg_sq = arg * arg
+    out[:n_valid] = np.rint((1.0 - 2.0 * arg_sq) * np.exp(-arg_sq) * amplitude)
+    return out
+
+
+def _generate_chunk_numpy(
+    out: np.ndarray,
+    table: np.ndarray,
+    start_degree: int,
+    event_active: bool,
+    event_offset: int,
+    sample_rate: float,
+    frequency: float,
+    event_amplitude: int,
+    event_total_samples: int,
+) -> np.ndarray:
+    out[:] = sine_generator(start_degree, out.size, table)
+    if event_active:
+        out += ricker_generator(
+            event_offset,
+            out.size,
+            sample_rate,
+            frequency,
+            event_amplitude,
+            event_total_samples,
+        )
+    return out
+
+
+def _generate_chunk_loop(
+    out: np.ndarray,
+    table: np.ndarray,
+    start_degree: int,
+    event_active: bool,
+    event_offset: int,
+    sample_rate: float,
+    frequency: float,
+    event_amplitude: int,
+    event_total_samples: int,
+) -> np.ndarray:
+    # Sine and Ricker wavelet in one pass, written straight into out. Each
+    # component is rounded on its own, as in _generate_chunk_numpy.
+    period = table.size
+    center = event_total_samples / 2.0
     pi_f = math.pi * frequency
-    arg = pi_f * t
-    wavelet = (1.0 - 2.0 * arg * arg) * np.exp(-(arg * arg))
-    wavelet[idx >= total_samples] = 0.0
-    return np.rint(wavelet * amplitude).astype(int)
+    for i in range(out.size):
+        value = table[(start_degree + i) % period]
+        idx = event_offset + i
+        if event_active and idx < event_total_samples:
+            arg = pi_f * ((idx - center) / sample_rate)
+            arg_sq = arg * arg
+            value += np.rint((1.0 - 2.0 * arg_sq) * math.exp(-arg_sq) * event_amplitude)
+        out[i] = value
+    return out
+
+
+if njit is None:
+    generate_chunk = _generate_chunk_numpy
+else:
+    generate_chunk = njit(cache=True)(_generate_chunk_loop)
 
 
 def build_sourceid(net: str, sta: str, loc: str, chan: str) -> str:
@@ -49,6 +129,8 @@ def validate_args(args: argparse.Namespace) -> None:
         raise ValueError("--samprate must be > 0")
     if args.chunk_samples <= 0:
         raise ValueError("--chunk-samples must be > 0")
+    if args.batch_chunks <= 0:
+        raise ValueError("--batch-chunks must be > 0")
     if args.amplitude <= 0:
         raise ValueError("--amplitude must be > 0")
     if args.count < 0:
@@ -69,7 +151,29 @@ def publish_message(channel, exchange: str, routing_key: str, payload: bytes) ->
         exchange=exchange,
         routing_key=routing_key,
         body=payload,
-        properties=pika.BasicProperties(content_type="application/vnd.fdsn.mseed"),
+        properties=MSEED_PROPERTIES,
+        mandatory=True,
+    )
+
+
+def enlarge_send_buffer(connection: pika.BlockingConnection, size: int) -> None:
+    # pika already enables TCP_NODELAY on connect but has no option for
+    # SO_SNDBUF, so reach the socket through the (private) transport.
+    transport = getattr(connection._impl, "_transport", None)
+    sock = getattr(transport, "_sock", None)
+    if sock is None:
+        logging.debug("AMQP socket not reachable, keeping default SO_SNDBUF")
+        return
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, size)
+
+
+def handle_returned(_channel, method, _properties, body: bytes) -> None:
+    logging.warning(
+        "Broker returned unroutable record: exchange=%s routing_key=%s reply=%s bytes=%d",
+        method.exchange,
+        method.routing_key,
+        method.reply_text,
+        len(body),
     )
 
 
@@ -87,6 +191,12 @@ def main() -> None:
     parser.add_argument("--chan", default="HHZ")
     parser.add_argument("--samprate", type=float, dest="sample_rate", default=40.0)
     parser.add_argument("--chunk-samples", type=int, default=128)
+    parser.add_argument(
+        "--batch-chunks",
+        type=int,
+        default=1,
+        help="Chunks generated, packed and published per loop iteration",
+    )
     parser.add_argument("--amplitude", type=int, default=500)
     parser.add_argument(
         "--event",
@@ -122,6 +232,8 @@ def main() -> None:
     sourceid = build_sourceid(args.net, args.sta, args.loc, args.chan)
     routing_key = f"{args.net}.{args.sta}.{args.loc}.{args.chan}"
     event_total_samples = int(args.event_duration * args.sample_rate)
+    sine_table = build_sine_table(args.amplitude)
+    batch_buffer = np.empty(args.chunk_samples * args.batch_chunks, dtype=np.int32)
     rng = np.random.default_rng()
     logging.debug(
         "Publish settings: sourceid=%s sample_rate=%s chunk_samples=%s amplitude=%s record_length=%s",
@@ -158,7 +270,12 @@ def main() -> None:
     )
 
     connection = pika.BlockingConnection(params)
+    enlarge_send_buffer(connection, SEND_BUFFER_BYTES)
     channel = connection.channel()
+    # Publisher confirms would make every basic_publish on a blocking channel
+    # wait for the broker; mandatory publishes report unroutable records here
+    # instead, dispatched whenever the I/O loop is drained.
+    channel.add_on_return_callback(handle_returned)
     logging.debug("AMQP connection established")
 
     if args.exchange:
@@ -173,33 +290,40 @@ def main() -> None:
     event_start_sample = 0
     event_active = False
 
+    # Chunks are paced against absolute integer-ns deadlines so that time
+    # spent generating and publishing does not accumulate as drift.
+    chunk_ns = int(args.chunk_samples / args.sample_rate * 1_000_000_000)
+    deadline_ns = time.perf_counter_ns()
+    debug_enabled = logging.getLogger().isEnabledFor(logging.DEBUG)
+    info_enabled = logging.getLogger().isEnabledFor(logging.INFO)
+
     try:
         chunk_idx = 0
         while RUNNING:
             if args.count and chunk_idx >= args.count:
                 break
 
-            chunk_size = args.chunk_samples
-            if chunk_size <= 0:
-                break
-            logging.debug(
-                "Chunk %d: chunk_size=%d start_time_ns=%d",
-                chunk_idx + 1,
-                chunk_size,
-                start_time_ns,
-            )
+            n_chunks = args.batch_chunks
+            if args.count:
+                n_chunks = min(n_chunks, args.count - chunk_idx)
+            batch_size = n_chunks * args.chunk_samples
+            samples = batch_buffer[:batch_size]
+            if debug_enabled:
+                logging.debug(
+                    "Chunk %d: chunks=%d batch_size=%d start_time_ns=%d",
+                    chunk_idx + 1,
+                    n_chunks,
+                    batch_size,
+                    start_time_ns,
+                )
 
-            loop_start = time.monotonic()
             traces = MS3TraceList()
-            samples = sine_generator(
-                start_degree=start_degree,
-                batch_size=chunk_size,
-                amplitude=args.amplitude,
-            )
+            # Events start on batch boundaries; scale the per-chunk
+            # probability to the number of chunks in this batch.
             if (
                 args.event
                 and not event_active
-                and rng.random() < args.event_probability
+                and rng.random() < 1.0 - (1.0 - args.event_probability) ** n_chunks
             ):
                 event_active = True
                 event_start_sample = total_samples
@@ -208,19 +332,20 @@ def main() -> None:
                     event_start_sample,
                     event_total_samples,
                 )
-            if args.event and event_active:
-                offset = total_samples - event_start_sample
-                event_samples = ricker_generator(
-                    start_sample=offset,
-                    batch_size=chunk_size,
-                    sample_rate=args.sample_rate,
-                    frequency=args.event_frequency,
-                    amplitude=args.event_amplitude,
-                    total_samples=event_total_samples,
-                )
-                samples = samples + event_samples
-                if offset + chunk_size >= event_total_samples:
-                    event_active = False
+            offset = total_samples - event_start_sample
+            generate_chunk(
+                samples,
+                sine_table,
+                start_degree,
+                event_active,
+                offset,
+                args.sample_rate,
+                args.event_frequency,
+                args.event_amplitude,
+                event_total_samples,
+            )
+            if event_active and offset + batch_size >= event_total_samples:
+                event_active = False
             traces.add_data(
                 sourceid=sourceid,
                 data_samples=samples,
@@ -229,39 +354,41 @@ def main() -> None:
                 start_time=start_time_ns,
             )
 
-            records = list(
-                traces.generate(
-                    format_version=format_version,
-                    record_length=args.record_length,
-                    flush_data=True,
-                    flush_idle_seconds=60,
-                    removed_packed=True,
-                )
-            )
-
-            for record in records:
+            chunk_records = 0
+            for record in traces.generate(
+                format_version=format_version,
+                record_length=args.record_length,
+                flush_data=True,
+                flush_idle_seconds=60,
+                removed_packed=True,
+            ):
                 publish_message(channel, args.exchange, routing_key, record)
+                chunk_records += 1
+                if chunk_records % PUBLISH_BATCH_SIZE == 0:
+                    connection.process_data_events(time_limit=0)
+            connection.process_data_events(time_limit=0)
 
-            total_records += len(records)
+            total_records += chunk_records
             total_samples += len(samples)
-            logging.info(
-                "Published chunk %d (%d records, %d samples) to %s",
-                chunk_idx + 1,
-                len(records),
-                len(samples),
-                routing_key,
-            )
+            if info_enabled:
+                logging.info(
+                    "Published chunk %d (%d records, %d samples) to %s",
+                    chunk_idx + n_chunks,
+                    chunk_records,
+                    len(samples),
+                    routing_key,
+                )
 
-            start_degree += chunk_size
-            start_time_ns += int(chunk_size / args.sample_rate * 1_000_000_000)
-            chunk_idx += 1
+            start_degree += batch_size
+            start_time_ns += n_chunks * chunk_ns
+            chunk_idx += n_chunks
 
-            target = chunk_size / args.sample_rate
-            elapsed = time.monotonic() - loop_start
-            sleep_for = max(0.0, target - elapsed)
-            if sleep_for:
-                logging.debug("Sleeping for %.3fs", sleep_for)
-                time.sleep(sleep_for)
+            deadline_ns += n_chunks * chunk_ns
+            sleep_ns = deadline_ns - time.perf_counter_ns()
+            if sleep_ns > 0:
+                if debug_enabled:
+                    logging.debug("Sleeping for %.3fs", sleep_ns / 1_000_000_000)
+                time.sleep(sleep_ns / 1_000_000_000)
 
         logging.info("Done. Total records=%d samples=%d", total_records, total_samples)
     finally:
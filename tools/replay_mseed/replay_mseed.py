@@ -2,13 +2,32 @@
 import argparse
 import logging
 import signal
+import socket
+import struct
 import time
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
+import numpy as np
 import pika
 from pymseed import MS3Record, nstime2timestr, sourceid2nslc
 
+try:
+    from crc32c import crc32c
+except ImportError:  # pragma: no cover - optional, enables header patching
+    crc32c = None
+
 RUNNING = True
+SEND_BUFFER_BYTES = 1 << 20
+PROGRESS_LOG_EVERY = 1000
+MSEED_PROPERTIES = pika.BasicProperties(content_type="application/vnd.fdsn.mseed")
+# miniSEED 3 fixed header: nanosecond, year, day-of-year, hour, minute and
+# second start at byte 4; the CRC-32C of the whole record sits at byte 28.
+MS3_START_TIME = struct.Struct("<IHHBBB")
+MS3_START_TIME_OFFSET = 4
+MS3_CRC = struct.Struct("<I")
+MS3_CRC_OFFSET = 28
 
 
 def handle_signal(signum, _frame) -> None:
@@ -17,8 +36,21 @@ def handle_signal(signum, _frame) -> None:
     RUNNING = False
 
 
+def split_sourceid(sourceid: str) -> tuple[str, str, str, str]:
+    """Split an FDSN source id into (net, sta, loc, chan)."""
+    if sourceid.startswith("FDSN:"):
+        parts = sourceid[5:].split("_")
+        if len(parts) == 6:
+            net, sta, loc, band, source, subsource = parts
+            if len(band) == len(source) == len(subsource) == 1:
+                return net, sta, loc, band + source + subsource
+    # Anything unusual goes through libmseed, which also rejects invalid ids.
+    return sourceid2nslc(sourceid)
+
+
+@lru_cache(maxsize=1024)
 def build_routing_key(sourceid: str) -> str:
-    net, sta, loc, chan = sourceid2nslc(sourceid)
+    net, sta, loc, chan = split_sourceid(sourceid)
     return f"{net}.{sta}.{loc}.{chan}"
 
 
@@ -27,17 +59,64 @@ def publish_message(channel, exchange: str, routing_key: str, payload: bytes) ->
         exchange=exchange,
         routing_key=routing_key,
         body=payload,
-        properties=pika.BasicProperties(content_type="application/vnd.fdsn.mseed"),
+        properties=MSEED_PROPERTIES,
+    )
+
+
+@dataclass(slots=True)
+class LoadedRecord:
+    starttime: int
+    sourceid: str
+    samprate: float
+    encoding: int
+    reclen: int
+    sampletype: str
+    samplecnt: int
+    # Either the decoded samples to repack, or the packed miniSEED 3 record
+    # whose start time is patched in place.
+    data: np.ndarray | None
+    raw: bytes | None
+
+
+def patch_ms3_starttime(raw: bytes, starttime_ns: int) -> bytes:
+    """Return a miniSEED 3 record with a new start time and matching CRC."""
+    seconds, nanosecond = divmod(starttime_ns, 1_000_000_000)
+    t = time.gmtime(seconds)
+    record = bytearray(raw)
+    MS3_START_TIME.pack_into(
+        record,
+        MS3_START_TIME_OFFSET,
+        nanosecond,
+        t.tm_year,
+        t.tm_yday,
+        t.tm_hour,
+        t.tm_min,
+        t.tm_sec,
     )
+    MS3_CRC.pack_into(record, MS3_CRC_OFFSET, 0)
+    MS3_CRC.pack_into(record, MS3_CRC_OFFSET, crc32c(record))
+    return bytes(record)
+
+
+def enlarge_send_buffer(connection: pika.BlockingConnection, size: int) -> None:
+    # pika sets TCP_NODELAY itself; SO_SNDBUF needs the underlying socket.
+    transport = getattr(connection._impl, "_transport", None)
+    sock = getattr(transport, "_sock", None)
+    if sock is None:
+        logging.debug("AMQP socket not reachable, keeping default SO_SNDBUF")
+        return
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, size)
 
 
 def load_records(
     file_paths: list[str],
     skip_not_data: bool,
     validate_crc: bool,
-) -> list[dict]:
-    records: list[dict] = []
-    seq = 0
+) -> list[LoadedRecord]:
+    records: list[LoadedRecord] = []
+    starttimes: list[int] = []
+    sourceids: list[str] = []
+    patched = 0
     for file_path in file_paths:
         logging.info(
             "Reading miniSEED from %s (skip_not_data=%s validate_crc=%s)",
@@ -51,31 +130,56 @@ def load_records(
             skip_not_data=skip_not_data,
             validate_crc=validate_crc,
         ):
+            # miniSEED 3 records only need their start time rewritten;
+            # anything else is repacked from its samples during replay.
+            if crc32c is not None and msr.formatversion == 3:
+                data = None
+                raw = msr.record
+                patched += 1
+            else:
+                # np_datasamples is a view into libmseed's record buffer,
+                # which is released once iteration moves on; keep a copy.
+                data = msr.np_datasamples.copy()
+                raw = None
             records.append(
-                {
-                    "starttime": msr.starttime,
-                    "sourceid": msr.sourceid,
-                    "samprate": msr.samprate,
-                    "encoding": msr.encoding,
-                    "reclen": msr.reclen,
-                    "sampletype": msr.sampletype or "i",
-                    "data": msr.np_datasamples.copy(),
-                    "seq": seq,
-                }
+                LoadedRecord(
+                    starttime=msr.starttime,
+                    sourceid=msr.sourceid,
+                    samprate=msr.samprate,
+                    encoding=msr.encoding,
+                    reclen=msr.reclen,
+                    sampletype=msr.sampletype or "i",
+                    samplecnt=msr.samplecnt,
+                    data=data,
+                    raw=raw,
+                )
             )
-            seq += 1
-    records.sort(key=lambda r: (r["starttime"], r["sourceid"], r["seq"]))
-    logging.info("Loaded %d records", len(records))
+            starttimes.append(msr.starttime)
+            sourceids.append(msr.sourceid)
+    # Order by (starttime, sourceid); lexsort is stable, so ties keep their
+    # read order without a separate sequence key.
+    order = np.lexsort(
+        (
+            np.array(sourceids),
+            np.fromiter(starttimes, dtype=np.int64, count=len(starttimes)),
+        )
+    )
+    records = [records[i] for i in order]
+    logging.info(
+        "Loaded %d records (%d patched in place, %d repacked)",
+        len(records),
+        patched,
+        len(records) - patched,
+    )
     return records
 
 
 def replay_records(
-    records: list[dict],
-    channel: Any,
+    records: list[LoadedRecord],
+    channels: list[Any],
     exchange: str,
 ) -> int:
-    first_start_ns = records[0]["starttime"]
-    loop_start = time.monotonic()
+    first_start_ns = records[0].starttime
     published = 0
     last_routing_key = None
     base_start_ns = int(time.time() * 1_000_000_000)
@@ -84,57 +188,85 @@ def replay_records(
     )
     logging.info("Shifting timestamps to start at %s", base_iso)
 
-    for rec in records:
+    # Replay schedule: offset of each record from the first one, used both as
+    # a deadline relative to the loop start and to shift the start time.
+    rel_ns = (
+        np.fromiter(
+            (rec.starttime for rec in records), dtype=np.int64, count=len(records)
+        )
+        - first_start_ns
+    )
+    offsets_ns = rel_ns.tolist()
+    new_starttimes = (rel_ns + base_start_ns).tolist()
+
+    # Checked once: the loop must not pay for formatting or the logging
+    # lock when INFO is off.
+    info_enabled = logging.getLogger().isEnabledFor(logging.INFO)
+    next_progress = PROGRESS_LOG_EVERY
+
+    # One record object is reused; every header field packed below is set
+    # for each input record, so nothing carries over between iterations.
+    msr = MS3Record()
+    loop_start_ns = time.perf_counter_ns()
+    for i, rec in enumerate(records):
         if not RUNNING:
             break
 
-        desired_elapsed = (rec["starttime"] - first_start_ns) / 1_000_000_000
-        elapsed = time.monotonic() - loop_start
-        sleep_for = desired_elapsed - elapsed
-        if sleep_for > 0:
-            time.sleep(sleep_for)
-
-        msr = MS3Record()
-        msr.sourceid = rec["sourceid"]
-        msr.samprate = rec["samprate"]
-        msr.encoding = rec["encoding"]
-        msr.reclen = rec["reclen"]
-        msr.starttime = base_start_ns + (rec["starttime"] - first_start_ns)
+        sleep_ns = offsets_ns[i] - (time.perf_counter_ns() - loop_start_ns)
+        if sleep_ns > 0:
+            time.sleep(sleep_ns / 1_000_000_000)
 
+        starttime = new_starttimes[i]
         try:
-            routing_key = build_routing_key(msr.sourceid)
+            routing_key = build_routing_key(rec.sourceid)
         except Exception:
             logging.exception(
-                "Unable to derive routing key from sourceid=%s", msr.sourceid
+                "Unable to derive routing key from sourceid=%s", rec.sourceid
             )
             raise
 
         if routing_key != last_routing_key:
-            logging.info(
-                "Routing key %s sourceid=%s start=%s samples=%d sr=%.3f",
-                routing_key,
-                msr.sourceid,
-                nstime2timestr(msr.starttime),
-                len(rec["data"]),
-                msr.samprate,
-            )
+            # Stable shard per routing key keeps each channel's order intact.
+            channel = channels[hash(routing_key) % len(channels)]
+            if info_enabled:
+                logging.info(
+                    "Routing key %s sourceid=%s start=%s samples=%d sr=%.3f",
+                    routing_key,
+                    rec.sourceid,
+                    nstime2timestr(starttime),
+                    rec.samplecnt,
+                    rec.samprate,
+                )
             last_routing_key = routing_key
 
-        out_records = list(
-            msr.generate(data_samples=rec["data"], sample_type=rec["sampletype"])
-        )
-        if len(out_records) != 1:
-            logging.warning(
-                "Repacked into %d records for sourceid=%s",
-                len(out_records),
-                msr.sourceid,
+        if rec.raw is not None:
+            publish_message(
+                channel, exchange, routing_key, patch_ms3_starttime(rec.raw, starttime)
             )
-        for record in out_records:
-            publish_message(channel, exchange, routing_key, record)
             published += 1
-
-        if published % 100 == 0:
+        else:
+            msr.sourceid = rec.sourceid
+            msr.samprate = rec.samprate
+            msr.encoding = rec.encoding
+            msr.reclen = rec.reclen
+            msr.starttime = starttime
+            repacked = 0
+            for record in msr.generate(
+                data_samples=rec.data, sample_type=rec.sampletype
+            ):
+                publish_message(channel, exchange, routing_key, record)
+                repacked += 1
+            published += repacked
+            if repacked != 1:
+                logging.warning(
+                    "Repacked into %d records for sourceid=%s",
+                    repacked,
+                    rec.sourceid,
+                )
+
+        if info_enabled and published >= next_progress:
             logging.info("Published %d records", published)
+            next_progress = published + PROGRESS_LOG_EVERY
 
     return published
 
@@ -160,8 +292,16 @@ def main() -> None:
         action="store_true",
         help="Disable CRC validation for miniSEED v3",
     )
+    parser.add_argument(
+        "--channels",
+        type=int,
+        default=1,
+        help="AMQP channels to spread routing keys across",
+    )
     parser.add_argument("--log-level", default="INFO")
     args = parser.parse_args()
+    if args.channels < 1:
+        parser.error("--channels must be >= 1")
 
     logging.basicConfig(
         level=getattr(logging, args.log_level.upper(), logging.INFO),
@@ -197,17 +337,18 @@ def main() -> None:
     )
 
     connection = pika.BlockingConnection(params)
-    channel = connection.channel()
+    enlarge_send_buffer(connection, SEND_BUFFER_BYTES)
+    channels = [connection.channel() for _ in range(args.channels)]
 
     if args.exchange:
-        channel.exchange_declare(
+        channels[0].exchange_declare(
             exchange=args.exchange, exchange_type="topic", durable=True
         )
 
     try:
         published = replay_records(
             records=records,
-            channel=channel,
+            channels=channels,
             exchange=args.exchange,
         )
         logging.info("Replay done: published %d records", published)